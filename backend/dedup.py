@@ -0,0 +1,412 @@
+"""
+Near-duplicate document index (MinHash + LSH) used to reuse stored summaries
+"""
+import json
+import os
+import tempfile
+import re
+import threading
+import time
+import zlib
+from array import array
+from collections import defaultdict
+from contextlib import contextmanager
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows: the index is then only safe for a single process
+    fcntl = None
+
+# Mersenne prime used for the MinHash permutations (a * x + b) mod p
+_MERSENNE_PRIME = (1 << 31) - 1
+
+
+def normalize_text(text):
+    """
+    Normalize text before shingling so cosmetic differences do not matter
+
+    Args:
+        text (str): Raw text, e.g. from extract_text_from_url/extract_text_from_pdf
+
+    Returns:
+        list: Lower-cased alphanumeric tokens
+    """
+    return re.findall(r"[a-z0-9]+", text.lower())
+
+
+class NearDuplicateIndex:
+    def __init__(self, path, threshold=0.8, num_perm=128, bands=32, shingle_size=5, seed=1,
+                 block_size=1024, max_entries=10000):
+        """
+        Initialize the index and memory-map any signatures already on disk
+
+        Args:
+            path (str): Directory holding the index files
+            threshold (float): Minimum estimated Jaccard similarity for a reuse
+            num_perm (int): Number of MinHash permutations per signature
+            bands (int): Number of LSH bands (must divide num_perm)
+            shingle_size (int): Number of words per shingle
+            seed (int): Seed for the permutation coefficients
+            block_size (int): Number of shingles hashed at a time
+            max_entries (int): Maximum number of stored documents; the oldest
+                quarter is evicted when the index is full
+        """
+        if num_perm % bands != 0:
+            raise ValueError("num_perm must be divisible by bands")
+        if max_entries < 1:
+            raise ValueError("max_entries must be at least 1")
+
+        self.path = path
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+        self.block_size = block_size
+        self.max_entries = max_entries
+
+        rng = np.random.RandomState(seed)
+        self._a = rng.randint(1, _MERSENNE_PRIME, size=num_perm, dtype=np.uint64)
+        self._b = rng.randint(0, _MERSENNE_PRIME, size=num_perm, dtype=np.uint64)
+
+        self._signatures_file = os.path.join(path, "signatures.bin")
+        self._entries_file = os.path.join(path, "entries.jsonl")
+        self._lock_file = os.path.join(path, "index.lock")
+        self._lock = threading.Lock()
+
+        # Metrics
+        self.lookups = 0
+        self.hits = 0
+        self.total_probe_seconds = 0.0
+        self.signatures = 0
+        self.total_signature_seconds = 0.0
+
+        os.makedirs(self.path, exist_ok=True)
+        with self._file_lock():
+            self._load_locked()
+        print(f"Loaded near-duplicate index with {len(self._offsets)} documents from {self.path}")
+
+    @contextmanager
+    def _file_lock(self):
+        """
+        Hold an exclusive lock on the index files across worker processes
+        """
+        with open(self._lock_file, "a") as f:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _load_locked(self):
+        """
+        Memory-map the signature file, index the entry offsets and rebuild the
+        LSH buckets, dropping rows that are not present and matching in both files
+        """
+        # Signatures persisted before this load are memory-mapped; rows added
+        # afterwards are kept in memory and appended to the same file. Only the
+        # byte offset of each entry line is kept, the stored results stay on disk.
+        self._mapped = np.zeros((0, self.num_perm), dtype=np.uint32)
+        self._added = []
+        self._offsets = array("q")
+        self._buckets = [defaultdict(list) for _ in range(self.bands)]
+
+        row_bytes = self.num_perm * 4
+        size = os.path.getsize(self._signatures_file) if os.path.exists(self._signatures_file) else 0
+        rows = size // row_bytes
+        if rows:
+            mapped = np.memmap(self._signatures_file, dtype=np.uint32, mode="r", shape=(rows, self.num_perm))
+        entries_size = 0
+
+        if os.path.exists(self._entries_file):
+            with open(self._entries_file, "rb") as f:
+                for line in iter(f.readline, b""):
+                    row_id = len(self._offsets)
+                    if row_id >= rows or not line.endswith(b"\n"):
+                        break  # orphan or partially written line
+                    # Each entry records the checksum of its signature so a pairing
+                    # broken by an interrupted write or compaction is detected
+                    if json.loads(line).get("sig") != self._checksum(mapped[row_id]):
+                        break
+                    self._offsets.append(entries_size)
+                    entries_size = f.tell()
+
+        # Keep both files at exactly `count` rows so row i always pairs entry line i
+        # with signature i; orphans of interrupted writes would otherwise shift the
+        # pairing of every entry appended later
+        count = len(self._offsets)
+        if size != count * row_bytes:
+            with open(self._signatures_file, "r+b") as f:
+                f.truncate(count * row_bytes)
+        if os.path.exists(self._entries_file) and os.path.getsize(self._entries_file) != entries_size:
+            with open(self._entries_file, "r+b") as f:
+                f.truncate(entries_size)
+
+        if count:
+            self._mapped = np.memmap(
+                self._signatures_file, dtype=np.uint32, mode="r", shape=(count, self.num_perm)
+            )
+        for row_id in range(count):
+            self._add_to_buckets(row_id, self._mapped[row_id])
+
+        self._files_state = self._stat_files()
+
+    def _stat_files(self):
+        """
+        Identity and size of both index files, used to notice changes by other processes
+        """
+        state = []
+        for path in (self._entries_file, self._signatures_file):
+            try:
+                st = os.stat(path)
+                state.append((st.st_ino, st.st_size))
+            except FileNotFoundError:
+                state.append(None)
+        return tuple(state)
+
+    def _sync_locked(self):
+        """
+        Reload if another process appended to or compacted the index files
+        """
+        if self._stat_files() != self._files_state:
+            self._load_locked()
+
+    @staticmethod
+    def _checksum(signature):
+        return zlib.crc32(np.asarray(signature, dtype=np.uint32).tobytes())
+
+    def signature(self, text):
+        """
+        Compute the MinHash signature of a text
+
+        Args:
+            text (str): The text to fingerprint
+
+        Returns:
+            np.ndarray: uint32 signature of length num_perm, or None if the text is empty
+        """
+        start = time.perf_counter()
+        try:
+            return self._compute_signature(text)
+        finally:
+            with self._lock:
+                self.signatures += 1
+                self.total_signature_seconds += time.perf_counter() - start
+
+    def _compute_signature(self, text):
+        """
+        MinHash a text's word shingles (see signature)
+        """
+        tokens = normalize_text(text)
+        if not tokens:
+            return None
+
+        k = min(self.shingle_size, len(tokens))
+        count = len(tokens) - k + 1
+        hashes = np.fromiter(
+            (zlib.crc32(" ".join(tokens[i:i + k]).encode("utf-8")) for i in range(count)),
+            dtype=np.uint64, count=count
+        ) % np.uint64(_MERSENNE_PRIME)
+
+        # Running minimum over fixed-size blocks keeps the (block, num_perm)
+        # intermediate bounded regardless of document length
+        signature = np.full(self.num_perm, _MERSENNE_PRIME, dtype=np.uint64)
+        for start in range(0, count, self.block_size):
+            block = hashes[start:start + self.block_size]
+            permuted = (np.outer(block, self._a) + self._b) % np.uint64(_MERSENNE_PRIME)
+            np.minimum(signature, permuted.min(axis=0), out=signature)
+        return signature.astype(np.uint32)
+
+    def _band_keys(self, signature):
+        """
+        Split a signature into per-band bucket keys
+        """
+        return [signature[i * self.rows:(i + 1) * self.rows].tobytes() for i in range(self.bands)]
+
+    def _add_to_buckets(self, row_id, signature):
+        for band, key in enumerate(self._band_keys(signature)):
+            self._buckets[band][key].append(row_id)
+
+    def _row(self, row_id):
+        mapped = len(self._mapped)
+        if row_id < mapped:
+            return self._mapped[row_id]
+        return self._added[row_id - mapped]
+
+    def _read_entry(self, f, row_id):
+        """
+        Read the entry of a row, or None if it no longer pairs with the signature
+        """
+        f.seek(self._offsets[row_id])
+        try:
+            entry = json.loads(f.readline())
+        except ValueError:
+            return None
+        if entry.get("sig") != self._checksum(self._row(row_id)):
+            return None
+        return entry
+
+    def lookup(self, text, style, max_length, min_length, signature=None):
+        """
+        Find a stored summary for a near-duplicate document with the same style and lengths
+
+        Args:
+            text (str): The text about to be summarized
+            style (str): Summarization style requested
+            max_length (int): Requested maximum summary length
+            min_length (int): Requested minimum summary length
+            signature (np.ndarray): Precomputed signature of text (optional)
+
+        Returns:
+            tuple: (stored summary dict or None, estimated similarity)
+        """
+        if signature is None:
+            signature = self.signature(text)
+
+        # Signature time is tracked separately in signature()
+        start = time.perf_counter()
+        best_result, best_similarity = None, 0.0
+        with self._lock:
+            self._sync_locked()
+            if signature is not None:
+                candidates = set()
+                for band, key in enumerate(self._band_keys(signature)):
+                    candidates.update(self._buckets[band].get(key, ()))
+
+                scored = sorted(
+                    ((float(np.mean(self._row(row_id) == signature)), row_id) for row_id in candidates),
+                    reverse=True
+                )
+                scored = [(similarity, row_id) for similarity, row_id in scored if similarity >= self.threshold]
+
+                # Only entries above the threshold are read from disk, best first
+                if scored:
+                    with open(self._entries_file, "rb") as f:
+                        for similarity, row_id in scored:
+                            entry = self._read_entry(f, row_id)
+                            if (entry is not None
+                                    and entry["style"] == style
+                                    and entry.get("max_length") == max_length
+                                    and entry.get("min_length") == min_length):
+                                best_result, best_similarity = entry["result"], similarity
+                                break
+
+            self.lookups += 1
+            if best_result is not None:
+                self.hits += 1
+            self.total_probe_seconds += time.perf_counter() - start
+
+        return best_result, best_similarity
+
+    def add(self, text, style, max_length, min_length, result, signature=None):
+        """
+        Store a summary so later near-duplicates can reuse it
+
+        Args:
+            text (str): The summarized text
+            style (str): Style used for the summary
+            max_length (int): Requested maximum summary length
+            min_length (int): Requested minimum summary length
+            result (dict): Summary information returned by the summarizer
+            signature (np.ndarray): Precomputed signature of text (optional)
+        """
+        if signature is None:
+            signature = self.signature(text)
+        if signature is None:
+            return
+
+        signature = signature.astype(np.uint32)
+        entry = {
+            "style": style,
+            "max_length": max_length,
+            "min_length": min_length,
+            "sig": self._checksum(signature),
+            "result": result
+        }
+        with self._lock, self._file_lock():
+            self._sync_locked()
+            if len(self._offsets) >= self.max_entries:
+                self._compact_locked(self.max_entries - self.max_entries // 4 - 1)
+
+            row_id = len(self._offsets)
+            # Write the entry before the signature so a crash never leaves an
+            # unlabelled signature behind (see _load_locked)
+            with open(self._entries_file, "ab") as f:
+                entries_size = f.tell()
+                f.write((json.dumps(entry) + "\n").encode("utf-8"))
+            try:
+                with open(self._signatures_file, "ab") as f:
+                    f.write(signature.tobytes())
+            except OSError:
+                # Roll the entry back so the files stay paired row by row
+                with open(self._entries_file, "r+b") as f:
+                    f.truncate(entries_size)
+                raise
+
+            self._offsets.append(entries_size)
+            self._added.append(signature)
+            self._add_to_buckets(row_id, signature)
+            self._files_state = self._stat_files()
+
+    def _compact_locked(self, keep):
+        """
+        Evict the oldest rows, keeping the newest `keep`, by rewriting both files
+        """
+        first = max(len(self._offsets) - keep, 0)
+        entries_tmp = tempfile.NamedTemporaryFile(dir=self.path, suffix=".tmp", delete=False)
+        signatures_tmp = tempfile.NamedTemporaryFile(dir=self.path, suffix=".tmp", delete=False)
+        try:
+            with open(self._entries_file, "rb") as src, entries_tmp:
+                if first < len(self._offsets):
+                    src.seek(self._offsets[first])
+                    while True:
+                        chunk = src.read(1 << 20)
+                        if not chunk:
+                            break
+                        entries_tmp.write(chunk)
+            with signatures_tmp:
+                for row_id in range(first, len(self._offsets)):
+                    signatures_tmp.write(np.asarray(self._row(row_id), dtype=np.uint32).tobytes())
+
+            # A crash between the two renames leaves mismatched checksums, which
+            # _load_locked treats as the end of the valid rows
+            os.replace(entries_tmp.name, self._entries_file)
+            os.replace(signatures_tmp.name, self._signatures_file)
+        finally:
+            for tmp in (entries_tmp, signatures_tmp):
+                if os.path.exists(tmp.name):
+                    os.remove(tmp.name)
+
+        self._load_locked()
+        print(f"Compacted near-duplicate index to {len(self._offsets)} documents")
+
+    def stats(self):
+        """
+        Get index size and reuse metrics
+
+        Returns:
+            dict: Index statistics
+        """
+        with self._lock:
+            size = len(self._offsets)
+            stats = {
+                "index_size": size,
+                "max_entries": self.max_entries,
+                "index_bytes": size * self.num_perm * 4,
+                "entries_bytes": self._files_state[0][1] if self._files_state[0] else 0,
+                "threshold": self.threshold,
+                "lookups": self.lookups,
+                "hits": self.hits,
+                "reuse_rate": self.hits / self.lookups if self.lookups else 0.0,
+            }
+            stats["avg_signature_ms"] = (
+                self.total_signature_seconds / self.signatures * 1000 if self.signatures else 0.0
+            )
+            stats["avg_probe_ms"] = self.total_probe_seconds / self.lookups * 1000 if self.lookups else 0.0
+            # End-to-end lookup latency: computing the signature plus probing the index
+            stats["avg_lookup_ms"] = stats["avg_signature_ms"] + stats["avg_probe_ms"]
+            return stats
@@ -0,0 +1,169 @@
+"""
+Rolling incremental summarization of live transcripts
+"""
+import re
+
+# Sentence end followed by whitespace, used to close segments at natural boundaries
+_SENTENCE_END = re.compile(r"[.!?]\s")
+
+
+class TranscriptBacklogFull(Exception):
+    """
+    Raised when a chunk is rejected because too many segments are waiting to be summarized
+    """
+
+
+class RollingSummarySession:
+    def __init__(self, summarize_fn, segment_words=300, max_open_summaries=8,
+                 max_length=80, min_length=20, style="default", max_pending_segments=16):
+        """
+        Initialize the per-connection rolling state
+
+        Args:
+            summarize_fn: Coroutine function (text, max_length, min_length, style) -> summary dict
+            segment_words (int): Number of transcript words that close a segment
+            max_open_summaries (int): Segment summaries kept before they are rolled up
+            max_length (int): Maximum length of each segment summary
+            min_length (int): Minimum length of each segment summary
+            style (str): Summarization style to use
+            max_pending_segments (int): Closed segments allowed to wait for a summary
+                before new chunks are rejected
+        """
+        self.summarize_fn = summarize_fn
+        self.segment_words = segment_words
+        self.max_open_summaries = max_open_summaries
+        self.max_length = max_length
+        self.min_length = min_length
+        self.style = style
+        self.max_pending_segments = max_pending_segments
+
+        # Summary of everything that has been rolled up so far
+        self.rolled_summary = ""
+        # Summaries of closed segments not yet rolled up
+        self.segment_summaries = []
+        # Closed segments waiting to be summarized; each is dropped only after
+        # its summary has been stored, so failed calls are retried later
+        self.pending_segments = []
+        # Transcript text not yet part of a closed segment
+        self.tail = ""
+        self.segments_closed = 0
+
+    @property
+    def running_summary(self):
+        """
+        Current summary of the whole transcript seen so far
+        """
+        return " ".join(part for part in [self.rolled_summary] + self.segment_summaries if part)
+
+    async def add_chunk(self, text, final=False):
+        """
+        Append a transcript chunk and summarize any segments it closes, retrying
+        segments left pending by an earlier failure
+
+        Args:
+            text (str): New transcript text
+            final (bool): Close the open tail regardless of its length
+
+        Returns:
+            bool: Whether the running summary changed
+
+        Raises:
+            TranscriptBacklogFull: If accepting text would queue more than
+                max_pending_segments segments; the text is not added and the
+                cause of the backlog (if any) is chained as __cause__
+            Exception: Whatever summarize_fn raises; unsummarized segments stay pending
+        """
+        changed = False
+        if text and self._would_overflow(text):
+            # Work off the backlog before accepting more text
+            try:
+                changed = await self._summarize_pending()
+            except Exception as e:
+                raise TranscriptBacklogFull(
+                    f"{len(self.pending_segments)} segments are waiting to be summarized; "
+                    "chunk rejected, resend it later"
+                ) from e
+            if self._would_overflow(text):
+                raise TranscriptBacklogFull(
+                    f"Chunk would close more than {self.max_pending_segments} segments; "
+                    "chunk rejected, send it in smaller chunks"
+                )
+
+        if text:
+            self.tail = f"{self.tail} {text}".strip() if self.tail else text.strip()
+
+        self.pending_segments.extend(self._close_segments(final))
+        changed = await self._summarize_pending() or changed
+
+        if len(self.segment_summaries) > self.max_open_summaries:
+            await self._roll_up()
+        return changed
+
+    async def _summarize_pending(self):
+        """
+        Summarize queued segments oldest first, removing each only once it is stored
+
+        Returns:
+            bool: Whether any segment was summarized
+        """
+        changed = False
+        while self.pending_segments:
+            segment = self.pending_segments[0]
+            if len(segment.split()) <= self.min_length:
+                # Too short to summarize, keep it verbatim
+                self.segment_summaries.append(segment)
+            else:
+                summary = await self.summarize_fn(segment, self.max_length, self.min_length, self.style)
+                self.segment_summaries.append(summary["summary"])
+            self.pending_segments.pop(0)
+            self.segments_closed += 1
+            changed = True
+        return changed
+
+    def _would_overflow(self, text):
+        """
+        Whether appending text would leave more than max_pending_segments queued
+        """
+        closing = (len(self.tail.split()) + len(text.split())) // self.segment_words
+        return len(self.pending_segments) + closing > self.max_pending_segments
+
+    def pending_words(self):
+        """
+        Number of words not yet summarized (queued segments and the open tail)
+        """
+        return sum(len(segment.split()) for segment in self.pending_segments) + len(self.tail.split())
+
+    def _close_segments(self, final):
+        """
+        Cut closed segments off the tail, preferring sentence boundaries
+
+        Returns:
+            list: Texts of the newly closed segments
+        """
+        segments = []
+        while len(self.tail.split()) >= self.segment_words:
+            words = self.tail.split()
+            window = " ".join(words[:self.segment_words])
+
+            # Close at the last sentence end in the second half of the window if there is one
+            boundaries = [m.end() for m in _SENTENCE_END.finditer(window + " ") if m.end() > len(window) // 2]
+            cut = boundaries[-1] if boundaries else len(window)
+            segments.append(window[:cut].strip())
+            self.tail = (window[cut:] + " " + " ".join(words[self.segment_words:])).strip()
+
+        if final and self.tail:
+            segments.append(self.tail)
+            self.tail = ""
+        return segments
+
+    async def _roll_up(self):
+        """
+        Fold the open segment summaries into the rolled summary so the input
+        of every model call stays bounded as the transcript grows
+        """
+        combined = self.running_summary
+        summary = await self.summarize_fn(
+            combined, self.max_length * 2, self.min_length, self.style
+        )
+        self.rolled_summary = summary["summary"]
+        self.segment_summaries = []
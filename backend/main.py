@@ -1,24 +1,53 @@
 """
 Updated FastAPI application for text summarization with multiple styles
 """
-from fastapi import FastAPI, HTTPException, UploadFile, File, Form, Request
-from fastapi.responses import JSONResponse
+from fastapi import FastAPI, HTTPException, UploadFile, File, Form, Request, Header, Depends
+from fastapi import WebSocket, WebSocketDisconnect
+from fastapi.responses import JSONResponse, FileResponse
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.concurrency import run_in_threadpool
 import uvicorn
 import traceback
+import hmac
 import os
 from typing import Optional
 from googletrans import Translator
 
-from .models import TextInput, UrlInput, SummaryResponse, StylesResponse, StyleInfo
+from .models import TextInput, UrlInput, SummaryResponse, StylesResponse, StyleInfo, ProfileInput
+from .models import MAX_TEXT_CHARS, MAX_PDF_BYTES, MAX_SUMMARY_LENGTH, TranscriptChunk
 from .summarizer import EnhancedTFSummarizer
 from .utils import extract_text_from_url, extract_text_from_pdf
+from .dedup import NearDuplicateIndex
+from .profiling import RequestProfiler, ProfilerMiddleware
+from .memory import MemoryEstimator, MemoryBudget, MemoryBudgetExceeded
+from .live import RollingSummarySession, TranscriptBacklogFull
+from pydantic import ValidationError
 
 # Initialize the summarizer with model name from environment variable or use default
 model_name = os.environ.get("MODEL_NAME", "facebook/bart-large-cnn")
 summarizer = EnhancedTFSummarizer(model_name=model_name)
 translator = Translator()
 
+# Near-duplicate index used to reuse summaries of syndicated/reposted documents
+dedup_index = None
+if os.environ.get("DEDUP_ENABLED", "1") == "1":
+    dedup_index = NearDuplicateIndex(
+        path=os.environ.get("DEDUP_INDEX_PATH", "dedup_index"),
+        threshold=float(os.environ.get("DEDUP_THRESHOLD", "0.8")),
+        max_entries=int(os.environ.get("DEDUP_MAX_ENTRIES", "10000"))
+    )
+
+# On-demand profiler; admin endpoints are disabled unless ADMIN_TOKEN is set
+profiler = RequestProfiler()
+admin_token = os.environ.get("ADMIN_TOKEN")
+
+# Admission control: requests reserve their estimated peak memory from a global budget
+memory_estimator = MemoryEstimator(summarizer.model.config)
+memory_budget = MemoryBudget(
+    total_bytes=int(os.environ.get("MEMORY_BUDGET_MB", "4096")) * 1024 * 1024,
+    queue_timeout=float(os.environ.get("MEMORY_QUEUE_TIMEOUT", "30"))
+)
+
 # Create FastAPI app
 app = FastAPI(
     title="Enhanced Text Summarization API",
@@ -35,6 +64,93 @@ app.add_middleware(
     allow_headers=["*"],  # Allow all headers
 )
 
+# Count requests for profiling sessions; a no-op pass-through while profiling is off
+app.add_middleware(ProfilerMiddleware, profiler=profiler)
+
+def require_admin(x_admin_token: Optional[str] = Header(None)):
+    """
+    Dependency that restricts an endpoint to callers presenting the admin token
+    """
+    if not admin_token:
+        raise HTTPException(status_code=403, detail="Admin endpoints are disabled")
+    if not x_admin_token or not hmac.compare_digest(x_admin_token.encode(), admin_token.encode()):
+        raise HTTPException(status_code=401, detail="Invalid admin token")
+
+def check_text_size(text):
+    """
+    Apply the same size limit as TextInput to text extracted from a URL or PDF
+    """
+    if len(text) > MAX_TEXT_CHARS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Extracted text exceeds the maximum of {MAX_TEXT_CHARS} characters"
+        )
+
+def generate_summary(text, max_length, min_length, style):
+    """
+    Run the model on text, using hierarchical summarization for long documents
+    """
+    # Check if this is a long document that needs hierarchical summarization
+    if len(text.split()) > 1000 and style in ["detailed", "very_detailed"]:
+        return summarizer.summarize_long_document(
+            text,
+            max_length=max_length,
+            min_length=min_length,
+            style=style
+        )
+    return summarizer.summarize(
+        text,
+        max_length=max_length,
+        min_length=min_length,
+        style=style
+    )
+
+async def run_model(text, max_length, min_length, style):
+    """
+    Reserve the estimated peak memory of a request, then run the model in the threadpool
+
+    Raises:
+        MemoryBudgetExceeded: If the request cannot be admitted
+    """
+    # Tokenizing for the estimate is CPU work, keep it off the event loop
+    shape = await run_in_threadpool(
+        summarizer.get_generation_shape, text, max_length=max_length, min_length=min_length, style=style
+    )
+    estimate = memory_estimator.estimate(**shape)
+    async with memory_budget.reserve(estimate):
+        return await run_in_threadpool(generate_summary, text, max_length, min_length, style)
+
+async def run_summarization(text, max_length, min_length, style):
+    """
+    Summarize text, reusing the stored summary of a near-duplicate document requested with
+    the same style and lengths if available, and waiting for enough of the memory budget
+    before running the model
+    """
+    signature = None
+    if dedup_index is not None:
+        signature = await run_in_threadpool(dedup_index.signature, text)
+        stored, _ = await run_in_threadpool(
+            dedup_index.lookup, text, style, max_length, min_length, signature
+        )
+        if stored is not None:
+            result = dict(stored)
+            result["original_length"] = len(text)
+            result["reused"] = True
+            return result
+
+    try:
+        result = await run_model(text, max_length, min_length, style)
+    except MemoryBudgetExceeded as e:
+        if e.retryable:
+            raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "5"})
+        raise HTTPException(status_code=413, detail=str(e))
+
+    if dedup_index is not None:
+        await run_in_threadpool(
+            dedup_index.add, text, style, max_length, min_length, result, signature
+        )
+    return result
+
 @app.get("/")
 async def root():
     """
@@ -48,7 +164,10 @@ async def root():
             "POST /summarize/text": "Summarize plain text",
             "POST /summarize/url": "Summarize content from URL",
             "POST /summarize/pdf": "Summarize content from PDF",
-            "POST /translate": "Translate text to another language"
+            "POST /translate": "Translate text to another language",
+            "WS /ws/transcript": "Rolling summary of a live transcript",
+            "GET /dedup/stats": "Get near-duplicate summary reuse statistics",
+            "GET /memory/stats": "Get memory budget usage statistics"
         }
     }
 
@@ -74,22 +193,16 @@ async def summarize_text(input_data: TextInput):
     Summarize plain text input with specified style
     """
     try:
-        # Check if this is a long document that needs hierarchical summarization
-        if len(input_data.text.split()) > 1000 and input_data.style in ["detailed", "very_detailed"]:
-            result = summarizer.summarize_long_document(
-                input_data.text,
-                max_length=input_data.max_length,
-                min_length=input_data.min_length,
-                style=input_data.style
-            )
-        else:
-            result = summarizer.summarize(
-                input_data.text,
-                max_length=input_data.max_length,
-                min_length=input_data.min_length,
-                style=input_data.style
-            )
+        result = await run_summarization(
+            input_data.text,
+            max_length=input_data.max_length,
+            min_length=input_data.min_length,
+            style=input_data.style
+        )
         return result
+    except HTTPException:
+        # Re-raise HTTP exceptions
+        raise
     except Exception as e:
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=str(e))
@@ -106,23 +219,20 @@ async def summarize_webpage(input_data: UrlInput):
         if not text:
             raise HTTPException(status_code=422, detail="Could not extract text from the URL")
         
-        # Check if this is a long document that needs hierarchical summarization
-        if len(text.split()) > 1000 and input_data.style in ["detailed", "very_detailed"]:
-            result = summarizer.summarize_long_document(
-                text,
-                max_length=input_data.max_length,
-                min_length=input_data.min_length,
-                style=input_data.style
-            )
-        else:
-            # Summarize extracted text
-            result = summarizer.summarize(
-                text,
-                max_length=input_data.max_length,
-                min_length=input_data.min_length,
-                style=input_data.style
-            )
+        # Reject extracted text over the input size limit
+        check_text_size(text)
+        
+        # Summarize extracted text
+        result = await run_summarization(
+            text,
+            max_length=input_data.max_length,
+            min_length=input_data.min_length,
+            style=input_data.style
+        )
         return result
+    except HTTPException:
+        # Re-raise HTTP exceptions
+        raise
     except Exception as e:
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=str(e))
@@ -130,8 +240,8 @@ async def summarize_webpage(input_data: UrlInput):
 @app.post("/summarize/pdf", response_model=SummaryResponse)
 async def summarize_pdf(
     file: UploadFile = File(...),
-    max_length: int = Form(150),
-    min_length: int = Form(30),
+    max_length: int = Form(150, ge=1, le=MAX_SUMMARY_LENGTH),
+    min_length: int = Form(30, ge=0, le=MAX_SUMMARY_LENGTH),
     style: str = Form("default")
 ):
     """
@@ -142,8 +252,13 @@ async def summarize_pdf(
         if not file.content_type or "pdf" not in file.content_type.lower():
             raise HTTPException(status_code=400, detail="Invalid file type. Please upload a PDF file.")
         
-        # Read file content
-        file_content = await file.read()
+        if min_length > max_length:
+            raise HTTPException(status_code=422, detail="min_length must not be greater than max_length")
+        
+        # Read file content, reading at most one byte past the limit
+        file_content = await file.read(MAX_PDF_BYTES + 1)
+        if len(file_content) > MAX_PDF_BYTES:
+            raise HTTPException(status_code=413, detail=f"PDF exceeds the maximum size of {MAX_PDF_BYTES // 2**20} MB")
         
         # Extract text from PDF
         text = extract_text_from_pdf(file_content)
@@ -151,22 +266,16 @@ async def summarize_pdf(
         if not text:
             raise HTTPException(status_code=422, detail="Could not extract text from the PDF")
         
-        # Check if this is a long document that needs hierarchical summarization
-        if len(text.split()) > 1000 and style in ["detailed", "very_detailed"]:
-            result = summarizer.summarize_long_document(
-                text,
-                max_length=max_length,
-                min_length=min_length,
-                style=style
-            )
-        else:
-            # Summarize extracted text
-            result = summarizer.summarize(
-                text,
-                max_length=max_length,
-                min_length=min_length,
-                style=style
-            )
+        # Reject extracted text over the input size limit
+        check_text_size(text)
+        
+        # Summarize extracted text
+        result = await run_summarization(
+            text,
+            max_length=max_length,
+            min_length=min_length,
+            style=style
+        )
         return result
     except HTTPException:
         # Re-raise HTTP exceptions
@@ -175,6 +284,131 @@ async def summarize_pdf(
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.websocket("/ws/transcript")
+async def summarize_transcript(
+    websocket: WebSocket,
+    style: str = "default",
+    segment_words: int = 300
+):
+    """
+    Keep a rolling summary of a live transcript sent as chunks over a WebSocket.
+    
+    Each message is a JSON object {"text": "...", "final": false}. Only newly closed
+    segments are summarized, and the running summary is pushed after every message.
+    """
+    await websocket.accept()
+    session = RollingSummarySession(
+        run_model,
+        segment_words=min(max(segment_words, 50), 800),
+        style=style
+    )
+    try:
+        while True:
+            try:
+                chunk = TranscriptChunk.parse_obj(await websocket.receive_json())
+            except (ValidationError, ValueError) as e:
+                await websocket.send_json({"type": "error", "detail": str(e)})
+                continue
+            
+            try:
+                changed = await session.add_chunk(chunk.text, final=chunk.final)
+            except (MemoryBudgetExceeded, TranscriptBacklogFull) as e:
+                cause = e if isinstance(e, MemoryBudgetExceeded) else e.__cause__
+                if isinstance(cause, MemoryBudgetExceeded) and not cause.retryable:
+                    # The queued text can never fit in the memory budget, retrying would stall forever
+                    await websocket.send_json({
+                        "type": "error",
+                        "detail": f"{str(cause)}. The session is closed.",
+                        "retryable": False
+                    })
+                    await websocket.close(code=1009, reason="Segment exceeds the memory budget")
+                    return
+                
+                if isinstance(e, TranscriptBacklogFull):
+                    detail = str(e)
+                else:
+                    # Unsummarized text stays queued in the session and is retried on the next message
+                    detail = f"{str(e)}. The text is queued and will be retried on the next message."
+                await websocket.send_json({
+                    "type": "error",
+                    "detail": detail,
+                    "retryable": True,
+                    "accepted": isinstance(e, MemoryBudgetExceeded),
+                    "queued_segments": len(session.pending_segments),
+                    "pending_words": session.pending_words()
+                })
+                continue
+            
+            await websocket.send_json({
+                "type": "summary",
+                "summary": session.running_summary,
+                "changed": changed,
+                "segments": session.segments_closed,
+                "queued_segments": len(session.pending_segments),
+                "pending_words": session.pending_words()
+            })
+    except WebSocketDisconnect:
+        pass
+    except Exception as e:
+        traceback.print_exc()
+        await websocket.close(code=1011, reason=str(e)[:120])
+
+@app.get("/memory/stats")
+async def memory_stats():
+    """
+    Get memory budget usage and admission control statistics
+    """
+    return memory_budget.stats()
+
+@app.get("/dedup/stats")
+async def dedup_stats():
+    """
+    Get near-duplicate index size, lookup latency and summary reuse rate
+    """
+    if dedup_index is None:
+        return {"enabled": False}
+    return {"enabled": True, **dedup_index.stats()}
+
+@app.post("/admin/profile", dependencies=[Depends(require_admin)])
+async def start_profile(input_data: ProfileInput):
+    """
+    Profile the next N requests or T seconds
+    """
+    try:
+        return profiler.start(
+            requests=input_data.requests,
+            seconds=input_data.seconds,
+            interval_ms=input_data.interval_ms,
+            tensorflow=input_data.tensorflow
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+@app.get("/admin/profile", dependencies=[Depends(require_admin)])
+async def profile_status():
+    """
+    Get the status of the current or last profiling session
+    """
+    return profiler.status()
+
+@app.post("/admin/profile/stop", dependencies=[Depends(require_admin)])
+async def stop_profile():
+    """
+    Stop the running profiling session early
+    """
+    return profiler.stop()
+
+@app.get("/admin/profile/download", dependencies=[Depends(require_admin)])
+async def download_profile():
+    """
+    Download the last profile as a zip with folded stacks (flamegraph) and optional TensorFlow trace
+    """
+    if profiler.artifact_path is None:
+        raise HTTPException(status_code=404, detail="No profile has been collected yet")
+    return FileResponse(profiler.artifact_path, media_type="application/zip", filename="profile.zip")
+
 @app.post("/translate")
 async def translate_text(data: dict):
     """
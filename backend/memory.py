@@ -0,0 +1,139 @@
+"""
+Peak memory estimation and a global memory budget for admission control
+"""
+import asyncio
+from contextlib import asynccontextmanager
+
+
+class MemoryBudgetExceeded(Exception):
+    """
+    Raised when a request can never fit in, or timed out waiting for, the memory budget
+    """
+    def __init__(self, message, retryable):
+        super().__init__(message)
+        self.retryable = retryable
+
+
+class MemoryEstimator:
+    def __init__(self, config, dtype_bytes=4, overhead_factor=1.5):
+        """
+        Initialize the estimator from a seq2seq model configuration
+
+        Args:
+            config: Hugging Face model config (BART-style attribute names)
+            dtype_bytes (int): Bytes per activation element (4 for float32)
+            overhead_factor (float): Multiplier for allocator fragmentation and temporaries
+        """
+        self.d_model = getattr(config, "d_model", 1024)
+        self.ffn_dim = getattr(config, "encoder_ffn_dim", 4 * self.d_model)
+        self.heads = getattr(config, "encoder_attention_heads", 16)
+        self.decoder_layers = getattr(config, "decoder_layers", 12)
+        self.vocab_size = getattr(config, "vocab_size", 50265)
+        self.dtype_bytes = dtype_bytes
+        self.overhead_factor = overhead_factor
+
+    def estimate(self, input_tokens, num_beams, max_length):
+        """
+        Predict the peak activation memory of one generate() call
+
+        Args:
+            input_tokens (int): Number of encoder input tokens
+            num_beams (int): Beam width
+            max_length (int): Maximum number of generated tokens
+
+        Returns:
+            int: Estimated peak memory in bytes (excluding model weights)
+        """
+        # Largest transient encoder layer: hidden states, attention scores and FFN
+        encoder = input_tokens * (2 * self.d_model + self.ffn_dim) + self.heads * input_tokens ** 2
+
+        # Encoder output repeated per beam plus cross-attention keys/values per decoder layer
+        cross = num_beams * input_tokens * self.d_model * (1 + 2 * self.decoder_layers)
+
+        # Self-attention keys/values cached for every generated position
+        self_cache = 2 * self.decoder_layers * num_beams * max_length * self.d_model
+
+        # Per-step logits (plus log-softmax copy) and attention scores
+        step = num_beams * (2 * self.vocab_size + self.heads * (max_length + input_tokens))
+
+        elements = encoder + cross + self_cache + step
+        return int(elements * self.dtype_bytes * self.overhead_factor)
+
+
+class MemoryBudget:
+    def __init__(self, total_bytes, queue_timeout=30.0):
+        """
+        Initialize a global budget shared by all in-flight requests
+
+        Args:
+            total_bytes (int): Memory available for request activations
+            queue_timeout (float): Seconds a request may wait for memory before being rejected
+        """
+        self.total_bytes = total_bytes
+        self.queue_timeout = queue_timeout
+        self.in_use = 0
+        self.waiting = 0
+        self.rejected = 0
+        self.peak_in_use = 0
+        self._condition = None
+
+    @asynccontextmanager
+    async def reserve(self, nbytes):
+        """
+        Hold nbytes of the budget for the duration of the block, queueing if needed
+
+        Args:
+            nbytes (int): Estimated peak memory of the request
+
+        Raises:
+            MemoryBudgetExceeded: If the request is larger than the whole budget
+                or no memory became available within queue_timeout
+        """
+        if nbytes > self.total_bytes:
+            self.rejected += 1
+            raise MemoryBudgetExceeded(
+                f"Request needs an estimated {nbytes // 2**20} MB, "
+                f"which exceeds the memory budget of {self.total_bytes // 2**20} MB",
+                retryable=False
+            )
+
+        # Created lazily so it binds to the running event loop
+        if self._condition is None:
+            self._condition = asyncio.Condition()
+
+        async with self._condition:
+            self.waiting += 1
+            try:
+                await asyncio.wait_for(
+                    self._condition.wait_for(lambda: self.in_use + nbytes <= self.total_bytes),
+                    timeout=self.queue_timeout
+                )
+            except asyncio.TimeoutError:
+                self.rejected += 1
+                raise MemoryBudgetExceeded("Server is busy, memory budget exhausted", retryable=True)
+            finally:
+                self.waiting -= 1
+            self.in_use += nbytes
+            self.peak_in_use = max(self.peak_in_use, self.in_use)
+
+        try:
+            yield
+        finally:
+            async with self._condition:
+                self.in_use -= nbytes
+                self._condition.notify_all()
+
+    def stats(self):
+        """
+        Get budget usage statistics
+
+        Returns:
+            dict: Budget statistics in bytes and counts
+        """
+        return {
+            "total_bytes": self.total_bytes,
+            "in_use_bytes": self.in_use,
+            "peak_in_use_bytes": self.peak_in_use,
+            "waiting": self.waiting,
+            "rejected": self.rejected
+        }
@@ -1,8 +1,25 @@
 """
 Updated Pydantic models for request/response validation with summarization styles
 """
-from pydantic import BaseModel, HttpUrl, Field
+from pydantic import BaseModel, HttpUrl, Field, validator
 from typing import Optional, List
+import os
+
+from .profiling import MIN_INTERVAL_MS, MAX_SECONDS, MAX_REQUESTS
+
+# Input size limits, overridable through environment variables
+MAX_TEXT_CHARS = int(os.environ.get("MAX_TEXT_CHARS", "200000"))
+MAX_PDF_BYTES = int(os.environ.get("MAX_PDF_BYTES", str(20 * 1024 * 1024)))
+MAX_SUMMARY_LENGTH = 1024
+
+def check_min_length(min_length, values):
+    """
+    Validate that min_length does not exceed max_length
+    """
+    max_length = values.get("max_length")
+    if max_length is not None and min_length > max_length:
+        raise ValueError("min_length must not be greater than max_length")
+    return min_length
 
 class StyleInfo(BaseModel):
     """
@@ -15,20 +32,31 @@ class TextInput(BaseModel):
     """
     Model for text input requests
     """
-    text: str = Field(..., description="Text content to summarize")
-    max_length: int = Field(150, description="Maximum length of the generated summary")
-    min_length: int = Field(30, description="Minimum length of the generated summary")
+    text: str = Field(..., max_length=MAX_TEXT_CHARS, description="Text content to summarize")
+    max_length: int = Field(150, ge=1, le=MAX_SUMMARY_LENGTH, description="Maximum length of the generated summary")
+    min_length: int = Field(30, ge=0, le=MAX_SUMMARY_LENGTH, description="Minimum length of the generated summary")
     style: str = Field("default", description="Summarization style to use")
+
+    _check_min_length = validator("min_length", allow_reuse=True)(check_min_length)
     
 class UrlInput(BaseModel):
     """
     Model for URL input requests
     """
     url: HttpUrl = Field(..., description="Web URL to fetch and summarize")
-    max_length: int = Field(150, description="Maximum length of the generated summary")
-    min_length: int = Field(30, description="Minimum length of the generated summary")
+    max_length: int = Field(150, ge=1, le=MAX_SUMMARY_LENGTH, description="Maximum length of the generated summary")
+    min_length: int = Field(30, ge=0, le=MAX_SUMMARY_LENGTH, description="Minimum length of the generated summary")
     style: str = Field("default", description="Summarization style to use")
 
+    _check_min_length = validator("min_length", allow_reuse=True)(check_min_length)
+
+class TranscriptChunk(BaseModel):
+    """
+    Model for a live transcript chunk received over the WebSocket
+    """
+    text: str = Field("", max_length=MAX_TEXT_CHARS, description="New transcript text")
+    final: bool = Field(False, description="Whether the transcript has ended")
+
 class SummaryResponse(BaseModel):
     """
     Model for summarization response
@@ -38,6 +66,7 @@ class SummaryResponse(BaseModel):
     summary_length: int
     style: str
     style_description: str
+    reused: bool = Field(False, description="Whether the summary was reused from a near-duplicate document")
 
 class StylesResponse(BaseModel):
     """
@@ -50,4 +79,13 @@ class TranslationInput(BaseModel):
     Model for translation requests
     """
     text: str = Field(..., description="Text to translate")
-    target_language: str = Field(..., description="Target language code")
\ No newline at end of file
+    target_language: str = Field(..., description="Target language code")
+
+class ProfileInput(BaseModel):
+    """
+    Model for starting a profiling session
+    """
+    requests: Optional[int] = Field(None, gt=0, le=MAX_REQUESTS, description="Number of requests to profile")
+    seconds: Optional[float] = Field(None, gt=0, le=MAX_SECONDS, description="Number of seconds to profile")
+    interval_ms: float = Field(5, ge=MIN_INTERVAL_MS, description="Sampling interval in milliseconds")
+    tensorflow: bool = Field(False, description="Also capture a TensorFlow profiler trace")
\ No newline at end of file
@@ -0,0 +1,253 @@
+"""
+On-demand sampling profiler for the inference hot path with flamegraph output
+"""
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import zipfile
+from collections import Counter
+
+# Bounds on a session so it cannot spin the sampler or run unattended
+MIN_INTERVAL_MS = 1
+MAX_SECONDS = 600
+MAX_REQUESTS = 10000
+
+# Innermost frames of threads that are blocked waiting for work (idle event
+# loop, idle threadpool workers); these are left out of the profile
+_IDLE_FRAMES = {
+    ("selectors.py", "select"),
+    ("threading.py", "wait"),
+    ("threading.py", "_wait_for_tstate_lock"),
+    ("queue.py", "get"),
+}
+
+
+class RequestProfiler:
+    def __init__(self):
+        """
+        Initialize an idle profiler. While idle the only per-request cost is
+        reading the `active` attribute.
+        """
+        self.active = False
+        self._lock = threading.Lock()
+        self._stacks = Counter()
+        self._thread = None
+        self._remaining_requests = None
+        self._deadline = None
+        self._interval = 0.005
+        self._tf_logdir = None
+        self._started_at = None
+        self._samples = 0
+        self._requests_profiled = 0
+        self.artifact_path = None
+        self.last_session = None
+
+    def start(self, requests=None, seconds=None, interval_ms=5, tensorflow=False):
+        """
+        Start a profiling session
+
+        Args:
+            requests (int): Stop after this many requests have completed
+            seconds (float): Stop after this many seconds
+            interval_ms (float): Sampling interval in milliseconds
+            tensorflow (bool): Also capture a TensorFlow profiler trace
+
+        Returns:
+            dict: Session status
+        """
+        if not requests and not seconds:
+            raise ValueError("Either requests or seconds must be given")
+        if requests is not None and not 0 < requests <= MAX_REQUESTS:
+            raise ValueError(f"requests must be between 1 and {MAX_REQUESTS}")
+        if seconds is not None and not 0 < seconds <= MAX_SECONDS:
+            raise ValueError(f"seconds must be greater than 0 and at most {MAX_SECONDS}")
+        if interval_ms < MIN_INTERVAL_MS:
+            raise ValueError(f"interval_ms must be at least {MIN_INTERVAL_MS}")
+
+        with self._lock:
+            if self.active or self._finishing():
+                raise RuntimeError("A profiling session is already running")
+
+            self._stacks = Counter()
+            self._samples = 0
+            self._requests_profiled = 0
+            self._remaining_requests = requests
+            self._deadline = time.monotonic() + seconds if seconds else None
+            self._interval = interval_ms / 1000.0
+            self._started_at = time.time()
+            self._tf_logdir = None
+
+            if tensorflow:
+                self._tf_logdir = tempfile.mkdtemp(prefix="tf_profile_")
+                try:
+                    import tensorflow as tf
+                    tf.profiler.experimental.start(self._tf_logdir)
+                except Exception as e:
+                    print(f"Could not start TensorFlow profiler: {str(e)}")
+                    shutil.rmtree(self._tf_logdir, ignore_errors=True)
+                    self._tf_logdir = None
+
+            self.active = True
+            self._thread = threading.Thread(target=self._sample_loop, name="request-profiler", daemon=True)
+            self._thread.start()
+
+        return self.status()
+
+    def request_finished(self):
+        """
+        Count a completed request and stop the session if the request budget is used up
+        """
+        with self._lock:
+            if not self.active:
+                return
+            self._requests_profiled += 1
+            if self._remaining_requests is not None:
+                self._remaining_requests -= 1
+                if self._remaining_requests <= 0:
+                    # The sampler thread notices this and builds the artifact
+                    self.active = False
+
+    def stop(self):
+        """
+        Stop the running session (if any); the artifact is built in the background
+        """
+        with self._lock:
+            self.active = False
+        return self.status()
+
+    def status(self):
+        """
+        Get the state of the current or last profiling session
+
+        Returns:
+            dict: Session status
+        """
+        return {
+            "active": self.active,
+            "finishing": self._finishing(),
+            "samples": self._samples,
+            "requests_profiled": self._requests_profiled,
+            "remaining_requests": self._remaining_requests,
+            "artifact_available": self.artifact_path is not None,
+            "last_session": self.last_session,
+        }
+
+    def _finishing(self):
+        """
+        Whether a stopped session is still writing its artifact
+        """
+        return not self.active and self._thread is not None and self._thread.is_alive()
+
+    def _sample_loop(self):
+        """
+        Periodically record the call stacks of all other busy threads, then build
+        the artifact once the session stops so request threads never wait on it
+        """
+        own_id = threading.get_ident()
+        while True:
+            with self._lock:
+                if not self.active:
+                    break
+                if self._deadline is not None and time.monotonic() >= self._deadline:
+                    self.active = False
+                    break
+
+                for thread_id, frame in sys._current_frames().items():
+                    if thread_id == own_id or self._is_idle(frame):
+                        continue
+                    stack = self._collapse(frame)
+                    if stack:
+                        self._stacks[stack] += 1
+                self._samples += 1
+            time.sleep(self._interval)
+
+        self._build_artifact()
+
+    @staticmethod
+    def _is_idle(frame):
+        """
+        Whether a thread is blocked waiting for work rather than serving a request
+        """
+        return (os.path.basename(frame.f_code.co_filename), frame.f_code.co_name) in _IDLE_FRAMES
+
+    @staticmethod
+    def _collapse(frame):
+        """
+        Convert a frame into a folded stack line (root first, ';' separated)
+        """
+        names = []
+        while frame is not None:
+            code = frame.f_code
+            names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+            frame = frame.f_back
+        names.reverse()
+        return ";".join(name.replace(";", ":") for name in names)
+
+    def _build_artifact(self):
+        """
+        Stop the TensorFlow profiler and write the results to a temporary zip
+        file. Runs in the sampler thread.
+        """
+        if self._tf_logdir is not None:
+            try:
+                import tensorflow as tf
+                tf.profiler.experimental.stop()
+            except Exception as e:
+                print(f"Could not stop TensorFlow profiler: {str(e)}")
+
+        folded = "\n".join(f"{stack} {count}" for stack, count in self._stacks.most_common())
+
+        fd, artifact_path = tempfile.mkstemp(prefix="profile_", suffix=".zip")
+        os.close(fd)
+        with zipfile.ZipFile(artifact_path, "w", zipfile.ZIP_DEFLATED) as archive:
+            # Folded stacks can be rendered with flamegraph.pl or speedscope
+            archive.writestr("profile.folded", folded + "\n")
+            if self._tf_logdir is not None:
+                for root, _, files in os.walk(self._tf_logdir):
+                    for name in files:
+                        full_path = os.path.join(root, name)
+                        archive.write(
+                            full_path,
+                            os.path.join("tensorflow", os.path.relpath(full_path, self._tf_logdir))
+                        )
+        if self._tf_logdir is not None:
+            shutil.rmtree(self._tf_logdir, ignore_errors=True)
+            self._tf_logdir = None
+
+        # Only the latest artifact is kept
+        previous, self.artifact_path = self.artifact_path, artifact_path
+        if previous is not None and os.path.exists(previous):
+            os.remove(previous)
+        self.last_session = {
+            "started_at": self._started_at,
+            "duration_seconds": time.time() - self._started_at,
+            "samples": self._samples,
+            "requests_profiled": self._requests_profiled,
+            "unique_stacks": len(self._stacks),
+        }
+
+
+class ProfilerMiddleware:
+    def __init__(self, app, profiler):
+        """
+        Plain ASGI middleware counting completed requests for an active profiling
+        session. When no session is active it passes the request straight through.
+
+        Args:
+            app: The wrapped ASGI application
+            profiler (RequestProfiler): Profiler whose request budget is counted
+        """
+        self.app = app
+        self.profiler = profiler
+
+    async def __call__(self, scope, receive, send):
+        if not self.profiler.active or scope["type"] != "http" or scope["path"].startswith("/admin"):
+            await self.app(scope, receive, send)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.profiler.request_finished()
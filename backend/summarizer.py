@@ -154,17 +154,9 @@ class EnhancedTFSummarizer:
         style_params = style_config["params"].copy()
         
         # Calculate dynamic lengths based on input size if factors are provided
-        text_length = len(text.split())
-        if "min_length_factor" in style_params:
-            min_length_factor = style_params.pop("min_length_factor")
-            min_length = max(min_length, int(text_length * min_length_factor))
-        
-        if "max_length_factor" in style_params:
-            max_length_factor = style_params.pop("max_length_factor")
-            max_length = max(max_length, int(text_length * max_length_factor))
-        
-        # Ensure max_length is at least min_length
-        max_length = max(max_length, min_length)
+        max_length, min_length = self._resolve_lengths(text, max_length, min_length, style_params)
+        style_params.pop("min_length_factor", None)
+        style_params.pop("max_length_factor", None)
         
         # Extract special parameters
         prefix = style_params.pop("prefix", "")
@@ -272,6 +264,50 @@ class EnhancedTFSummarizer:
                 "style_description": self.styles[style]["description"]
             }
     
+    def get_generation_shape(self, text, max_length=150, min_length=30, style="default"):
+        """
+        Get the quantities that drive peak memory of a summarize() call
+        
+        Args:
+            text (str): The text to summarize
+            max_length (int): Maximum summary length
+            min_length (int): Minimum summary length
+            style (str): Summarization style to use
+            
+        Returns:
+            dict: Input token count, number of beams and effective max_length
+        """
+        style_params = self.styles.get(style, self.styles["default"])["params"]
+        max_length, _ = self._resolve_lengths(text, max_length, min_length, style_params)
+        input_tokens = len(self.tokenizer(
+            self._truncate_text(text, 1024), max_length=1024, truncation=True
+        )["input_ids"])
+        return {
+            "input_tokens": input_tokens,
+            "num_beams": style_params.get("num_beams", 1),
+            "max_length": max_length
+        }
+    
+    def _resolve_lengths(self, text, max_length, min_length, style_params):
+        """
+        Apply style length factors and clamp lengths to what the model can generate
+        """
+        text_length = len(text.split())
+        if "min_length_factor" in style_params:
+            min_length = max(min_length, int(text_length * style_params["min_length_factor"]))
+        
+        if "max_length_factor" in style_params:
+            max_length = max(max_length, int(text_length * style_params["max_length_factor"]))
+        
+        # Never generate past the model's position embeddings
+        model_max = getattr(self.model.config, "max_position_embeddings", 1024)
+        min_length = min(min_length, model_max)
+        max_length = min(max_length, model_max)
+        
+        # Ensure max_length is at least min_length
+        max_length = max(max_length, min_length)
+        return max_length, min_length
+    
     def _truncate_text(self, text, max_tokens):
         """
         Truncate text to max_tokens (approximate implementation)
@@ -0,0 +1,7 @@
+"""
+Make the backend package importable when running pytest from any directory
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
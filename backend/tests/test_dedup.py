@@ -0,0 +1,163 @@
+"""
+Tests for the near-duplicate summary index
+"""
+import numpy as np
+import pytest
+
+from backend.dedup import NearDuplicateIndex
+
+ARTICLE = " ".join(f"word{i}" for i in range(400))
+RESULT = {"summary": "stored summary", "style": "default"}
+
+
+def test_near_duplicate_with_different_boilerplate_is_reused(tmp_path):
+    index = NearDuplicateIndex(str(tmp_path))
+    index.add(ARTICLE, "default", 150, 30, RESULT)
+
+    stored, similarity = index.lookup("Subscribe now! " + ARTICLE + " Share this article.", "default", 150, 30)
+
+    assert stored == RESULT
+    assert similarity >= index.threshold
+
+
+def test_different_document_is_not_reused(tmp_path):
+    index = NearDuplicateIndex(str(tmp_path))
+    index.add(ARTICLE, "default", 150, 30, RESULT)
+
+    other = " ".join(f"other{i}" for i in range(400))
+    assert index.lookup(other, "default", 150, 30)[0] is None
+
+
+def test_lookup_requires_same_style_and_lengths(tmp_path):
+    index = NearDuplicateIndex(str(tmp_path))
+    index.add(ARTICLE, "default", 150, 30, RESULT)
+
+    assert index.lookup(ARTICLE, "concise", 150, 30)[0] is None
+    assert index.lookup(ARTICLE, "default", 50, 30)[0] is None
+    assert index.lookup(ARTICLE, "default", 150, 10)[0] is None
+
+
+def test_signature_does_not_depend_on_block_size(tmp_path):
+    small_blocks = NearDuplicateIndex(str(tmp_path / "a"), block_size=7)
+    one_block = NearDuplicateIndex(str(tmp_path / "b"), block_size=10 ** 6)
+
+    assert np.array_equal(small_blocks.signature(ARTICLE), one_block.signature(ARTICLE))
+
+
+def test_index_is_reloaded_from_disk(tmp_path):
+    NearDuplicateIndex(str(tmp_path)).add(ARTICLE, "default", 150, 30, RESULT)
+
+    reloaded = NearDuplicateIndex(str(tmp_path))
+
+    assert isinstance(reloaded._mapped, np.memmap)
+    assert reloaded.stats()["index_size"] == 1
+    assert reloaded.lookup(ARTICLE, "default", 150, 30)[0] == RESULT
+
+
+def test_partially_written_signature_is_dropped_on_reload(tmp_path):
+    index = NearDuplicateIndex(str(tmp_path))
+    index.add(ARTICLE, "default", 150, 30, RESULT)
+    with open(tmp_path / "signatures.bin", "ab") as f:
+        f.write(b"\x00" * 10)
+
+    reloaded = NearDuplicateIndex(str(tmp_path))
+
+    assert reloaded.stats()["index_size"] == 1
+    assert (tmp_path / "signatures.bin").stat().st_size == index.num_perm * 4
+
+
+def test_stats_report_reuse_rate(tmp_path):
+    index = NearDuplicateIndex(str(tmp_path))
+    index.add(ARTICLE, "default", 150, 30, RESULT)
+    index.lookup(ARTICLE, "default", 150, 30)
+    index.lookup("unrelated text entirely", "default", 150, 30)
+
+    stats = index.stats()
+    assert stats["lookups"] == 2
+    assert stats["hits"] == 1
+    assert stats["reuse_rate"] == 0.5
+    assert stats["avg_signature_ms"] > 0
+    assert stats["avg_lookup_ms"] == stats["avg_signature_ms"] + stats["avg_probe_ms"]
+
+
+def test_orphan_entry_line_does_not_shift_later_entries(tmp_path):
+    other = " ".join(f"other{i}" for i in range(400))
+    index = NearDuplicateIndex(str(tmp_path))
+    index.add(ARTICLE, "default", 150, 30, RESULT)
+    # An entry whose signature was never written (crash or failed write)
+    with open(tmp_path / "entries.jsonl", "a", encoding="utf-8") as f:
+        f.write('{"style": "default", "max_length": 150, "min_length": 30, "result": {"summary": "orphan"}}\n')
+
+    NearDuplicateIndex(str(tmp_path)).add(other, "default", 150, 30, {"summary": "other"})
+    reloaded = NearDuplicateIndex(str(tmp_path))
+
+    assert reloaded.stats()["index_size"] == 2
+    assert reloaded.lookup(other, "default", 150, 30)[0] == {"summary": "other"}
+    assert reloaded.lookup(ARTICLE, "default", 150, 30)[0] == RESULT
+
+
+def test_failed_signature_write_rolls_back_entry(tmp_path, monkeypatch):
+    index = NearDuplicateIndex(str(tmp_path))
+    index.add(ARTICLE, "default", 150, 30, RESULT)
+    entries_size = (tmp_path / "entries.jsonl").stat().st_size
+    signatures_file = str(tmp_path / "signatures.bin")
+
+    real_open = open
+
+    def failing_open(file, mode="r", *args, **kwargs):
+        if file == signatures_file and "a" in mode:
+            raise OSError("disk full")
+        return real_open(file, mode, *args, **kwargs)
+
+    monkeypatch.setattr("builtins.open", failing_open)
+    with pytest.raises(OSError):
+        index.add("completely different text " * 50, "default", 150, 30, {"summary": "lost"})
+    monkeypatch.undo()
+
+    assert (tmp_path / "entries.jsonl").stat().st_size == entries_size
+
+
+def document(i):
+    return " ".join(f"doc{i}_{j}" for j in range(200))
+
+
+def test_oldest_entries_are_evicted_when_full(tmp_path):
+    index = NearDuplicateIndex(str(tmp_path), max_entries=8)
+    for i in range(20):
+        index.add(document(i), "default", 150, 30, {"summary": f"summary {i}"})
+
+    assert index.stats()["index_size"] <= 8
+    assert index.lookup(document(0), "default", 150, 30)[0] is None
+    assert index.lookup(document(19), "default", 150, 30)[0] == {"summary": "summary 19"}
+
+    reloaded = NearDuplicateIndex(str(tmp_path), max_entries=8)
+    assert reloaded.stats()["index_size"] == index.stats()["index_size"]
+    assert reloaded.lookup(document(18), "default", 150, 30)[0] == {"summary": "summary 18"}
+
+
+def test_interrupted_compaction_does_not_mispair_entries(tmp_path):
+    index = NearDuplicateIndex(str(tmp_path))
+    for i in range(4):
+        index.add(document(i), "default", 150, 30, {"summary": f"summary {i}"})
+    # Simulate a crash after the entries file was replaced but before the
+    # signatures were: the newest two entries now sit at rows 0 and 1
+    lines = (tmp_path / "entries.jsonl").read_bytes().splitlines(keepends=True)
+    (tmp_path / "entries.jsonl").write_bytes(b"".join(lines[2:]))
+
+    reloaded = NearDuplicateIndex(str(tmp_path))
+
+    for i in range(4):
+        stored = reloaded.lookup(document(i), "default", 150, 30)[0]
+        assert stored is None or stored == {"summary": f"summary {i}"}
+
+
+def test_entries_added_by_another_process_are_seen(tmp_path):
+    first = NearDuplicateIndex(str(tmp_path))
+    second = NearDuplicateIndex(str(tmp_path))
+
+    first.add(document(1), "default", 150, 30, {"summary": "from first"})
+    second.add(document(2), "default", 150, 30, {"summary": "from second"})
+
+    assert second.lookup(document(1), "default", 150, 30)[0] == {"summary": "from first"}
+    assert first.lookup(document(2), "default", 150, 30)[0] == {"summary": "from second"}
+    assert NearDuplicateIndex(str(tmp_path)).stats()["index_size"] == 2
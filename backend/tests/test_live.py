@@ -0,0 +1,151 @@
+"""
+Tests for rolling incremental transcript summarization
+"""
+import asyncio
+
+import pytest
+
+from backend.live import RollingSummarySession, TranscriptBacklogFull
+from backend.memory import MemoryBudgetExceeded
+
+
+def words(prefix, count):
+    return " ".join(f"{prefix}{i}" for i in range(count))
+
+
+class FakeSummarizer:
+    """
+    Records the inputs it is called with and can be made to fail
+    """
+    def __init__(self, failures=0, fail_when=None):
+        self.calls = []
+        self.failures = failures
+        self.fail_when = fail_when or (lambda text: True)
+
+    async def __call__(self, text, max_length, min_length, style):
+        if self.failures and self.fail_when(text):
+            self.failures -= 1
+            raise MemoryBudgetExceeded("Server is busy, memory budget exhausted", retryable=True)
+        self.calls.append(text)
+        return {"summary": f"<{len(text.split())}>"}
+
+
+def test_segments_close_at_word_limit_without_punctuation():
+    summarizer = FakeSummarizer()
+    session = RollingSummarySession(summarizer, segment_words=50)
+
+    asyncio.run(session.add_chunk(words("w", 120)))
+
+    assert [len(call.split()) for call in summarizer.calls] == [50, 50]
+    assert session.pending_words() == 20
+    assert session.running_summary == "<50> <50>"
+
+
+def test_segments_close_at_sentence_end_in_second_half():
+    summarizer = FakeSummarizer()
+    session = RollingSummarySession(summarizer, segment_words=50)
+
+    text = words("a", 39) + ". " + words("b", 30)
+    asyncio.run(session.add_chunk(text))
+
+    assert len(summarizer.calls) == 1
+    assert summarizer.calls[0].endswith(".")
+    assert len(summarizer.calls[0].split()) == 39
+    assert session.tail == words("b", 30)
+
+
+def test_short_final_tail_is_kept_verbatim():
+    summarizer = FakeSummarizer()
+    session = RollingSummarySession(summarizer, segment_words=50, min_length=20)
+
+    asyncio.run(session.add_chunk("just a few words", final=True))
+
+    assert summarizer.calls == []
+    assert session.running_summary == "just a few words"
+    assert session.pending_words() == 0
+
+
+def test_roll_up_keeps_model_input_bounded():
+    summarizer = FakeSummarizer()
+    session = RollingSummarySession(summarizer, segment_words=50, max_open_summaries=3)
+
+    for i in range(20):
+        asyncio.run(session.add_chunk(words(f"c{i}_", 50)))
+
+    assert session.segments_closed == 20
+    assert len(session.segment_summaries) <= 3
+    assert max(len(call.split()) for call in summarizer.calls) <= 50
+
+
+def test_failed_summary_keeps_segment_queued_and_retries():
+    summarizer = FakeSummarizer(failures=1)
+    session = RollingSummarySession(summarizer, segment_words=50, min_length=10)
+
+    with pytest.raises(MemoryBudgetExceeded):
+        asyncio.run(session.add_chunk(words("w", 120)))
+
+    # Nothing was lost: both closed segments are queued and the tail is intact
+    assert len(session.pending_segments) == 2
+    assert session.pending_words() == 120
+    assert session.segment_summaries == []
+
+    changed = asyncio.run(session.add_chunk("", final=True))
+
+    assert changed
+    assert session.pending_segments == []
+    assert " ".join(summarizer.calls) == words("w", 120)
+    assert session.segments_closed == 3
+
+
+def test_failed_roll_up_keeps_segment_summaries():
+    # Only the roll-up call (whose input is made of segment summaries) fails
+    summarizer = FakeSummarizer(fail_when=lambda text: text.startswith("<"))
+    session = RollingSummarySession(summarizer, segment_words=50, max_open_summaries=1)
+
+    asyncio.run(session.add_chunk(words("a", 50)))
+    summarizer.failures = 1
+    with pytest.raises(MemoryBudgetExceeded):
+        asyncio.run(session.add_chunk(words("b", 50)))
+
+    assert session.segment_summaries == ["<50>", "<50>"]
+    assert session.pending_segments == []
+
+    asyncio.run(session.add_chunk(""))
+
+    assert session.segment_summaries == []
+    assert session.rolled_summary == "<2>"
+
+
+def test_chunks_are_rejected_once_backlog_is_full():
+    summarizer = FakeSummarizer(failures=100)
+    session = RollingSummarySession(summarizer, segment_words=50, max_pending_segments=2)
+
+    with pytest.raises(MemoryBudgetExceeded):
+        asyncio.run(session.add_chunk(words("a", 100)))
+    assert len(session.pending_segments) == 2
+
+    with pytest.raises(TranscriptBacklogFull) as exc_info:
+        asyncio.run(session.add_chunk(words("b", 50)))
+
+    # The rejected chunk was not added and the backlog did not grow
+    assert isinstance(exc_info.value.__cause__, MemoryBudgetExceeded)
+    assert len(session.pending_segments) == 2
+    assert session.pending_words() == 100
+
+    # Once summarization works again the backlog drains and the chunk is accepted
+    summarizer.failures = 0
+    assert asyncio.run(session.add_chunk(words("b", 50)))
+    assert session.pending_segments == []
+    assert session.segments_closed == 3
+
+
+def test_chunk_closing_too_many_segments_is_rejected():
+    summarizer = FakeSummarizer()
+    session = RollingSummarySession(summarizer, segment_words=50, max_pending_segments=2)
+
+    with pytest.raises(TranscriptBacklogFull) as exc_info:
+        asyncio.run(session.add_chunk(words("a", 150)))
+
+    assert exc_info.value.__cause__ is None
+    assert session.pending_words() == 0
+    assert summarizer.calls == []
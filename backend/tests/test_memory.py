@@ -0,0 +1,79 @@
+"""
+Tests for memory estimation and the global memory budget
+"""
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from backend.memory import MemoryBudget, MemoryBudgetExceeded, MemoryEstimator
+
+
+def test_estimate_grows_with_tokens_beams_and_length():
+    estimator = MemoryEstimator(SimpleNamespace())
+    base = estimator.estimate(200, 4, 150)
+
+    assert estimator.estimate(1024, 4, 150) > base
+    assert estimator.estimate(200, 6, 150) > base
+    assert estimator.estimate(200, 4, 1024) > base
+
+
+def test_request_larger_than_budget_is_rejected_immediately():
+    budget = MemoryBudget(100, queue_timeout=10)
+
+    async def run():
+        async with budget.reserve(101):
+            pass
+
+    with pytest.raises(MemoryBudgetExceeded) as exc_info:
+        asyncio.run(run())
+    assert not exc_info.value.retryable
+    assert budget.stats()["rejected"] == 1
+
+
+def test_request_waits_for_memory_to_be_released():
+    budget = MemoryBudget(100, queue_timeout=1)
+    order = []
+
+    async def job(name, nbytes, hold):
+        async with budget.reserve(nbytes):
+            order.append(name)
+            await asyncio.sleep(hold)
+
+    async def run():
+        first = asyncio.create_task(job("first", 60, 0.05))
+        await asyncio.sleep(0)
+        await asyncio.gather(first, job("second", 60, 0))
+
+    asyncio.run(run())
+    assert order == ["first", "second"]
+    stats = budget.stats()
+    assert stats["in_use_bytes"] == 0
+    assert stats["peak_in_use_bytes"] == 60
+
+
+def test_queued_request_times_out():
+    budget = MemoryBudget(100, queue_timeout=0.05)
+
+    async def hold():
+        async with budget.reserve(80):
+            await asyncio.sleep(0.2)
+
+    async def waiter():
+        async with budget.reserve(80):
+            pass
+
+    async def run():
+        holder = asyncio.create_task(hold())
+        await asyncio.sleep(0)
+        with pytest.raises(MemoryBudgetExceeded) as exc_info:
+            await waiter()
+        await holder
+        return exc_info.value
+
+    error = asyncio.run(run())
+    assert error.retryable
+    stats = budget.stats()
+    assert stats["rejected"] == 1
+    assert stats["waiting"] == 0
+    assert stats["in_use_bytes"] == 0
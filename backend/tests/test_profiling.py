@@ -0,0 +1,159 @@
+"""
+Tests for the on-demand request profiler
+"""
+import asyncio
+import os
+import threading
+import time
+import zipfile
+
+import pytest
+
+from backend.profiling import MAX_SECONDS, ProfilerMiddleware, RequestProfiler
+
+
+@pytest.fixture
+def profiler():
+    profiler = RequestProfiler()
+    yield profiler
+    profiler.stop()
+    if profiler._thread is not None:
+        profiler._thread.join()
+    if profiler.artifact_path is not None and os.path.exists(profiler.artifact_path):
+        os.remove(profiler.artifact_path)
+
+
+def busy_work(seconds=0.05):
+    end = time.monotonic() + seconds
+    while time.monotonic() < end:
+        sum(range(1000))
+
+
+def wait_until_finished(profiler):
+    profiler._thread.join(timeout=5)
+    assert not profiler._thread.is_alive()
+
+
+def read_folded(profiler):
+    with zipfile.ZipFile(profiler.artifact_path) as archive:
+        assert archive.namelist() == ["profile.folded"]
+        return archive.read("profile.folded").decode("utf-8")
+
+
+def test_session_stops_after_request_budget(profiler):
+    profiler.start(requests=2, interval_ms=1)
+    busy_work()
+    profiler.request_finished()
+    assert profiler.active
+
+    busy_work()
+    profiler.request_finished()
+    assert not profiler.active
+
+    wait_until_finished(profiler)
+    status = profiler.status()
+    assert status["artifact_available"]
+    assert status["requests_profiled"] == 2
+    assert status["last_session"]["samples"] > 0
+
+
+def test_session_stops_at_deadline(profiler):
+    profiler.start(seconds=0.05, interval_ms=1)
+    busy_work(0.1)
+
+    wait_until_finished(profiler)
+    assert not profiler.active
+    assert profiler.status()["artifact_available"]
+
+
+def test_stop_ends_session_early(profiler):
+    profiler.start(seconds=MAX_SECONDS, interval_ms=1)
+    busy_work()
+
+    status = profiler.stop()
+
+    assert not status["active"]
+    wait_until_finished(profiler)
+    assert profiler.status()["artifact_available"]
+    assert not profiler.status()["finishing"]
+
+
+def test_second_concurrent_start_is_rejected(profiler):
+    profiler.start(seconds=MAX_SECONDS)
+
+    with pytest.raises(RuntimeError):
+        profiler.start(seconds=1)
+
+
+@pytest.mark.parametrize("kwargs", [
+    {},
+    {"seconds": 1, "interval_ms": 0.001},
+    {"seconds": MAX_SECONDS + 1},
+    {"requests": 0, "seconds": None},
+])
+def test_invalid_sessions_are_rejected(profiler, kwargs):
+    with pytest.raises(ValueError):
+        profiler.start(**kwargs)
+    assert not profiler.active
+
+
+def test_artifact_contains_folded_stacks_of_busy_threads_only(profiler):
+    release = threading.Event()
+    idle = threading.Thread(target=release.wait, name="idle-worker")
+    idle.start()
+    try:
+        profiler.start(requests=1, interval_ms=1)
+        busy_work(0.1)
+        profiler.request_finished()
+        wait_until_finished(profiler)
+    finally:
+        release.set()
+        idle.join()
+
+    folded = read_folded(profiler)
+    lines = folded.strip().splitlines()
+    assert lines
+    for line in lines:
+        stack, count = line.rsplit(" ", 1)
+        assert int(count) > 0
+        assert stack.split(";")[0]
+    assert any("busy_work (test_profiling.py:" in line for line in lines)
+    # The thread blocked in Event.wait is idle and must not be sampled
+    leaves = [line.rsplit(" ", 1)[0].split(";")[-1] for line in lines]
+    assert not any(leaf.startswith("wait (threading.py:") for leaf in leaves)
+
+
+def test_new_artifact_replaces_previous_file(profiler):
+    profiler.start(requests=1, interval_ms=1)
+    profiler.request_finished()
+    wait_until_finished(profiler)
+    first = profiler.artifact_path
+
+    profiler.start(requests=1, interval_ms=1)
+    profiler.request_finished()
+    wait_until_finished(profiler)
+
+    assert profiler.artifact_path != first
+    assert not os.path.exists(first)
+    assert os.path.exists(profiler.artifact_path)
+
+
+def test_middleware_counts_only_profiled_http_requests(profiler):
+    calls = []
+
+    async def app(scope, receive, send):
+        calls.append(scope["path"])
+
+    middleware = ProfilerMiddleware(app, profiler=profiler)
+
+    def request(path, scope_type="http"):
+        asyncio.run(middleware({"type": scope_type, "path": path}, None, None))
+
+    request("/health")
+    profiler.start(requests=5, interval_ms=1)
+    request("/summarize/text")
+    request("/admin/profile")
+    request("/ws/transcript", scope_type="websocket")
+
+    assert calls == ["/health", "/summarize/text", "/admin/profile", "/ws/transcript"]
+    assert profiler.status()["requests_profiled"] == 1